@@ -8,7 +8,8 @@ single endpoint, ``/v1/amounts/extract``, which accepts either a
 piece of text or an image file via a multipart form.  The endpoint
 invokes functions from ``amount_extractor`` to perform OCR (when
 available), tokenisation, normalisation and classification.  The
-resulting amounts are returned in a structured JSON object.
+resulting amounts are returned in a structured JSON object, serialised
+with ``orjson``.
 
 Note that ``FastAPI`` automatically requires ``python‑multipart`` for
 parsing form data.  If ``python‑multipart`` is not installed in your
@@ -19,24 +20,45 @@ service.
 
 from __future__ import annotations
 
-from typing import Optional
+from typing import List, Optional
 
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
 
 import amount_extractor as ae
 
 
+class AmountOut(BaseModel):
+    """A single classified amount and the text it was found in."""
+
+    type: str
+    value: float
+    source: str
+
+
+class ExtractOut(BaseModel):
+    """Successful response body of ``/v1/amounts/extract``."""
+
+    confidence: float
+    currency: str
+    amounts: List[AmountOut]
+    validation_status: str
+    status: str
+
+
 app = FastAPI(
     title="Amount Extraction Service",
     version="0.1",
+    default_response_class=ORJSONResponse,
     description=(
         "Extracts monetary amounts from text or images and returns them in a structured JSON format."
     ),
 )
 
 
-@app.post("/v1/amounts/extract")
+@app.post("/v1/amounts/extract", response_model=ExtractOut)
 async def extract_amounts(
     file: Optional[UploadFile] = File(None),
     text: Optional[str] = Form(None),
@@ -56,10 +78,13 @@ async def extract_amounts(
     extracted_text = ""
     if file is not None:
         try:
-            file_bytes = await file.read()
-            extracted_text = ae.extract_text_from_image(file_bytes)
+            # The upload is already spooled to a temporary file, so hand
+            # that to OCR directly.  OCR is blocking, so run it off the
+            # event loop.
+            await file.seek(0)
+            extracted_text = await run_in_threadpool(ae.extract_text_from_image_stream, file.file)
         except RuntimeError as e:
-            return JSONResponse(status_code=422, content={"status": "ocr_unavailable", "reason": str(e)})
+            return ORJSONResponse(status_code=422, content={"status": "ocr_unavailable", "reason": str(e)})
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to process image: {e}")
     else:
@@ -69,7 +94,7 @@ async def extract_amounts(
     # Step 2: tokenise and normalise
     tokens,tokens_corrected, total_tokens = ae.find_numeric_tokens(extracted_text, window=2)
     if not tokens:
-        return JSONResponse(status_code=422, content={"status": "no_amounts_found", "reason": "document too noisy"})
+        return ORJSONResponse(status_code=422, content={"status": "no_amounts_found", "reason": "document too noisy"})
     correction_penalty = 0.25 
     normalization_confidence = 1.0 
     if total_tokens > 0:
@@ -89,4 +114,4 @@ async def extract_amounts(
         "validation_status": validation_status,
         "status": "ok",
     }
-    return JSONResponse(status_code=200, content=response)
\ No newline at end of file
+    return response
\ No newline at end of file
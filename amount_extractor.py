@@ -13,9 +13,14 @@ Functions provided
 ------------------
 
 extract_text_from_image
-    Perform OCR on an uploaded image using pytesseract when
-    available.  Raises a RuntimeError if the necessary libraries
-    are missing.
+    Perform OCR on an uploaded image using tesserocr or pytesseract
+    when available.  Results are cached by image content so repeated
+    uploads skip Tesseract.  Raises a RuntimeError if the necessary
+    libraries are missing.
+
+extract_text_from_image_stream
+    Same as ``extract_text_from_image`` but reads the image from a
+    file object, avoiding a full in-memory copy of large uploads.
 
 find_numeric_tokens
     Locate numeric tokens (integers, floats or percentages) in a
@@ -38,37 +43,262 @@ expose these functions via FastAPI.
 
 from __future__ import annotations
 
+import atexit
+import hashlib
 import io
+import os
+import queue
 import re
+import threading
+from collections import OrderedDict, deque
 from dataclasses import dataclass
-from typing import List, Tuple, Dict, Any, Union
+from itertools import islice
+from typing import BinaryIO, Callable, Deque, FrozenSet, List, Tuple, Dict, Any, Union
+
+try:
+    from PIL import Image, ImageOps  # type: ignore
+    _PIL_AVAILABLE = True
+except ImportError:
+    _PIL_AVAILABLE = False
+
+# OCR runs in worker threads so several images can be processed at once;
+# keep each Tesseract call single-threaded so those workers do not
+# oversubscribe the CPU.  This must happen before tesserocr is imported,
+# because OpenMP reads its settings when libtesseract is loaded, and
+# pytesseract's subprocesses inherit it.  An explicit setting wins.
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+# tesserocr keeps the Tesseract engine loaded in-process and releases the
+# GIL while recognising, so it is preferred over pytesseract, which spawns
+# a tesseract subprocess for every image.
+try:
+    import tesserocr  # type: ignore
+    _TESSEROCR_AVAILABLE = True
+except ImportError:
+    _TESSEROCR_AVAILABLE = False
 
 try:
-    from PIL import Image  # type: ignore
     import pytesseract  # type: ignore
-    _OCR_AVAILABLE = True
+    _PYTESSERACT_AVAILABLE = True
 except ImportError:
-    _OCR_AVAILABLE = False
+    _PYTESSERACT_AVAILABLE = False
+
+_OCR_AVAILABLE = _PIL_AVAILABLE and (_TESSEROCR_AVAILABLE or _PYTESSERACT_AVAILABLE)
+
+
+# Bounded LRU cache of OCR output keyed by a digest of the image bytes.
+# OCR may run in several threads at once, hence the lock.
+_OCR_CACHE_SIZE = 256
+_READ_CHUNK_SIZE = 64 * 1024
+_ocr_cache: "OrderedDict[bytes, str]" = OrderedDict()
+_ocr_cache_lock = threading.Lock()
+
+# A tesserocr API object must not be used by two threads at once, and
+# each one holds its own copy of the language model.  Engines are kept
+# in a bounded pool, created on first demand up to one per CPU, and
+# checked out for the duration of a single recognition.  The semaphore
+# admits at most as many threads as there can be engines, so a thread
+# that has to wait only does so while every engine exists and an idle
+# one is on its way back.
+_TESSEROCR_POOL_SIZE = os.cpu_count() or 1
+_tesserocr_pool: "queue.Queue[Any]" = queue.Queue()
+_tesserocr_slots = threading.BoundedSemaphore(_TESSEROCR_POOL_SIZE)
+_tesserocr_pool_lock = threading.Lock()
+_tesserocr_created = 0
+
+
+def _acquire_tesserocr_api() -> Any:
+    """Check out an engine, creating one if the pool is below its limit.
+
+    Every engine returned must be handed back with
+    ``_release_tesserocr_api``.
+    """
+    global _tesserocr_created
+    _tesserocr_slots.acquire()
+    try:
+        try:
+            return _tesserocr_pool.get_nowait()
+        except queue.Empty:
+            pass
+        with _tesserocr_pool_lock:
+            if _tesserocr_created < _TESSEROCR_POOL_SIZE:
+                api = tesserocr.PyTessBaseAPI(lang="eng")
+                _tesserocr_created += 1
+                return api
+        return _tesserocr_pool.get()
+    except BaseException:
+        _tesserocr_slots.release()
+        raise
+
+
+def _release_tesserocr_api(api: Any) -> None:
+    _tesserocr_pool.put(api)
+    _tesserocr_slots.release()
+
+
+@atexit.register
+def _close_tesserocr_pool() -> None:
+    while True:
+        try:
+            _tesserocr_pool.get_nowait().End()
+        except queue.Empty:
+            break
+
+
+# Pixel lookup table for binarising an 8-bit grayscale image.
+_THRESHOLD = 128
+_THRESHOLD_LUT = [255 if p > _THRESHOLD else 0 for p in range(256)]
+
+
+def _preprocess(im: "Image.Image") -> "Image.Image":
+    """Convert an image to high-contrast black and white for OCR.
+
+    Tesseract is both faster and more accurate on a clean binary image
+    than on a colour photo of a bill.  Transparent images are first
+    flattened onto white, since transparent pixels are usually stored
+    as black and would otherwise swallow dark text.
+    """
+    if 'A' in im.getbands() or "transparency" in im.info:
+        rgba = im.convert("RGBA")
+        background = Image.new("RGB", rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        im = background
+    gray = ImageOps.autocontrast(im.convert("L"))
+    return gray.point(_THRESHOLD_LUT, "1")
+
+
+def _recognise(im: "Image.Image") -> str:
+    """Run Tesseract on an opened image with the best available binding."""
+    if _TESSEROCR_AVAILABLE:
+        api = _acquire_tesserocr_api()
+        try:
+            api.SetImage(im)
+            return api.GetUTF8Text()
+        finally:
+            _release_tesserocr_api(api)
+    return pytesseract.image_to_string(im)
+
+
+# Lookup table and patterns used by the tokeniser.  They are constant,
+# so build them once at import time rather than on every call.  The
+# table both corrects OCR confusions and deletes everything that is not
+# part of the number, so no separate stripping pass is needed.
+_CLEAN_TABLE = str.maketrans({
+    'O': '0', 'o': '0',
+    'l': '1', 'I': '1', 'i': '1',
+    'S': '5', 's': '5',
+    'B': '8', 'b': '8',
+    'Z': '2', 'z': '2',
+    ',': '',  # Strip commas (thousands separator)
+    ';': '.',  # Treat semi-colon as a decimal point
+    'E': '3', 'e': '3',
+    'g': '9', 'G': '9',
+    'A': '4', 'a': '4',
+    '|': '1',
+    '%': '',  # Percentages are detected from the raw token
+})
+# Byte-level equivalent of ``_CLEAN_TABLE`` for ASCII tokens; commas and
+# '%' are removed through the ``delete`` argument of ``bytes.translate``.
+_CONFUSION_BYTES = bytes.maketrans(b"OolIiSsBbZzEegGAa;|", b"00111558822339944.1")
+_NUM_RE = re.compile(r"(\d[\dOolISsBZ,]*\d|\d)(?:\.\d+)?%?")
+_SEGMENT_RE = re.compile(r"[\|\n]")
+_LETTER_RE = re.compile(r"[^\W\d_]")
+# Matches one whitespace-delimited word; the ``num`` group is set when the
+# word contains a digit and therefore needs scanning with ``_NUM_RE``.
+_WORD_RE = re.compile(r"(?P<num>\S*?\d\S*)|\S+")
+
+# Ordered keyword rules used by ``classify_amounts``.  Later entries are
+# only considered if no earlier rule matched.
+_RULES: Tuple[Tuple[str, FrozenSet[str]], ...] = (
+    ("total_bill", frozenset({"total", "grand", "amount", "balance", "subtotal", "grana", "t0tal"})),
+    ("paid", frozenset({"paid", "payment", "received", "settled", "cash", "paymeni", "receivcd", "pald"})),
+    ("due", frozenset({"due", "unpaid", "outstanding", "owed", "balance due"})),
+    ("tax", frozenset({"tax", "gst", "cgst", "sgst", "igst"})),
+    ("change", frozenset({"change", "returned", "overpayment"})),
+)
+
+
+def _compile_rule_matcher(rules: Tuple[Tuple[str, FrozenSet[str]], ...]) -> Callable[[str], str]:
+    """Generate a function that applies ``rules`` to a lower-cased context.
+
+    Every keyword test is written out inline, which CPython runs faster
+    than looping over the keywords or searching a regular expression per
+    rule.  For ``_RULES`` the generated source looks like::
+
+        def _match_rule(s):
+            if 'amount' in s or 'balance' in s or ...:
+                return 'total_bill'
+            ...
+            return 'other'
+    """
+    lines = ["def _match_rule(s):"]
+    for name, keywords in rules:
+        tests = " or ".join(f"{kw!r} in s" for kw in sorted(keywords))
+        lines.append(f"    if {tests}:")
+        lines.append(f"        return {name!r}")
+    lines.append("    return 'other'")
+    namespace: Dict[str, Any] = {}
+    exec(compile("\n".join(lines), "<generated rule matcher>", "exec"), namespace)
+    return namespace["_match_rule"]
+
+
+# Returns the first rule with a keyword in a lower-cased context, or 'other'.
+_match_rule = _compile_rule_matcher(_RULES)
 
 
 def extract_text_from_image(file_bytes: bytes) -> str:
     """Attempt to perform OCR on a provided image.
 
+    Raises:
+        RuntimeError: If OCR libraries are unavailable.
+    """
+    return extract_text_from_image_stream(io.BytesIO(file_bytes))
+
+
+def extract_text_from_image_stream(fp: BinaryIO) -> str:
+    """Perform OCR on an image read from a seekable binary file object.
+
+    The image is read from the current position of ``fp`` without
+    first copying it into memory, so large uploads spooled to disk can
+    be passed straight through.  Identical images are only recognised
+    once; later calls are served from an in-memory LRU cache.
+
     Raises:
         RuntimeError: If OCR libraries are unavailable.
     """
     if not _OCR_AVAILABLE:
         raise RuntimeError(
-            "OCR functionality is not available – please install Pillow and pytesseract or provide a plain text input instead."
+            "OCR functionality is not available – please install Pillow and tesserocr or pytesseract, or provide a plain text input instead."
         )
-    with Image.open(io.BytesIO(file_bytes)) as im:  # type: ignore[name-defined]
-        return pytesseract.image_to_string(im)
+    start = fp.tell()
+    hasher = hashlib.blake2b(digest_size=16)
+    for chunk in iter(lambda: fp.read(_READ_CHUNK_SIZE), b""):
+        hasher.update(chunk)
+    key = hasher.digest()
+    with _ocr_cache_lock:
+        cached = _ocr_cache.get(key)
+        if cached is not None:
+            _ocr_cache.move_to_end(key)
+            return cached
+    fp.seek(start)
+    with Image.open(fp) as im:  # type: ignore[name-defined]
+        text = _recognise(_preprocess(im))
+    with _ocr_cache_lock:
+        _ocr_cache[key] = text
+        _ocr_cache.move_to_end(key)
+        if len(_ocr_cache) > _OCR_CACHE_SIZE:
+            _ocr_cache.popitem(last=False)
+    return text
 
 
 @dataclass
 class Token:
     """Represents a candidate numeric token extracted from the input text."""
 
+    # Slots avoid a per-instance ``__dict__``; a document yields one
+    # Token per numeric match.
+    __slots__ = ("raw", "normalized", "context")
+
     raw: str
     normalized: float
     context: str
@@ -86,55 +316,66 @@ def find_numeric_tokens(text: str, window: int = 5) -> Tuple[List[Token], int, i
         A list of ``Token`` objects with raw and normalised values.
     """
     tokens: List[Token] = []
-    confusion_map = str.maketrans({
-        'O': '0', 'o': '0',
-        'l': '1', 'I': '1', 'i': '1',
-        'S': '5', 's': '5',
-        'B': '8',  'b': '8',
-        'Z': '2', 'z': '2',
-        ',': '',
-                  # Existing: Strip commas (thousands separator)
-        ';': '.',
-        # NEW: Treat semi-colon as a decimal point
-        'E': '3', 'e': '3',
-        'g': '9', 'G': '9',
-        'A': '4', 'a': '4',
-        '|': '1', 
-        
-    })
     total_tokens = 0
     tokens_corrected = 0
-    words = re.findall(r"\S+", text)
-    word_bounds: List[Tuple[int, int]] = []
-    cursor = 0
-    for w in words:
-        start = text.find(w, cursor)
-        end = start + len(w)
-        word_bounds.append((start, end))
-        cursor = end
-        
-        
-        
-    pattern = re.compile(r"(\d[\dOolISsBZ,]*\d|\d)(?:\.\d+)?%?")
-    for match in pattern.finditer(text):
-        
-        total_tokens += 1
-        raw_token = match.group()
-        char_index = match.start()
-        word_index = next((i for i, (s, e) in enumerate(word_bounds) if s <= char_index < e), 0)
-        start_word = max(0, word_index - window)
-        end_word = min(len(words), word_index + window + 1)
-        context_snippet = " ".join(words[start_word:end_word])
-        corrected = raw_token.translate(confusion_map)
-        if raw_token != corrected:
-            tokens_corrected += 1
-        numeric_part = re.sub(r"[^\d\.]+", "", corrected)
-        try:
-            # Cast to float if decimal is present, otherwise to int then float (to handle large integers correctly)
-            value = float(numeric_part) if '.' in numeric_part else float(int(numeric_part))
-        except ValueError:
-            continue
-        tokens.append(Token(raw=raw_token, normalized=value, context=context_snippet))
+    # Single pass over the words of the text.  Words containing a digit
+    # are scanned for numeric tokens; a token's context snippet is built
+    # once the ``window`` words to its right have been read.  Only the
+    # last ``2 * window + 1`` words are ever needed, so keep them in a
+    # bounded ring buffer.
+    recent: Deque[str] = deque(maxlen=2 * window + 1)
+    pending: Deque[Tuple[int, str, float]] = deque()
+    word_count = 0
+
+    def context_for(word_index: int) -> str:
+        base = word_count - len(recent)
+        start_word = max(0, word_index - window) - base
+        end_word = min(word_count, word_index + window + 1) - base
+        return " ".join(islice(recent, start_word, end_word))
+
+    for m in _WORD_RE.finditer(text):
+        word = m.group()
+        recent.append(word)
+        word_count += 1
+        if m.lastgroup == 'num':
+            for match in _NUM_RE.finditer(word):
+                total_tokens += 1
+                raw_token = match.group()
+                numeric_part: Union[str, bytes]
+                if raw_token.isdecimal():
+                    # Most tokens are plain digit runs with nothing to
+                    # correct or strip.
+                    numeric_part = raw_token
+                    has_point = False
+                else:
+                    # A trailing '%' is dropped by the translation without
+                    # being a correction, so compare against the raw token
+                    # without it.
+                    if raw_token.isascii():
+                        raw_bytes = raw_token.encode('ascii')
+                        numeric_part = raw_bytes.translate(_CONFUSION_BYTES, b",%")
+                        was_corrected = numeric_part != raw_bytes.rstrip(b"%")
+                        has_point = b"." in numeric_part
+                    else:
+                        # \d also matches non-ASCII digits, which need the str path.
+                        numeric_part = raw_token.translate(_CLEAN_TABLE)
+                        was_corrected = numeric_part != raw_token.rstrip('%')
+                        has_point = '.' in numeric_part
+                    if was_corrected:
+                        tokens_corrected += 1
+                try:
+                    # Cast to float if decimal is present, otherwise to int then float (to handle large integers correctly)
+                    value = float(numeric_part) if has_point else float(int(numeric_part))
+                except (ValueError, OverflowError):
+                    # Digit runs beyond int()'s string conversion limit, or
+                    # too large for a float, are not usable amounts.
+                    continue
+                pending.append((word_count - 1, raw_token, value))
+        while pending and pending[0][0] + window < word_count:
+            word_index, raw_token, value = pending.popleft()
+            tokens.append(Token(raw=raw_token, normalized=value, context=context_for(word_index)))
+    for word_index, raw_token, value in pending:
+        tokens.append(Token(raw=raw_token, normalized=value, context=context_for(word_index)))
     return tokens,tokens_corrected,total_tokens
 
 
@@ -155,19 +396,8 @@ def classify_amounts(tokens: List[Token]) -> List[Dict[str, object]]:
     Returns:
         A list of dictionaries with ``type``, ``value`` and ``source``.
     """
-    # Define the ordered keyword rules.  Later entries are only
-    # considered if no earlier rule matched.
-    rules: List[Tuple[str, List[str]]] = [
-         ("total_bill", ["total", "grand", "amount", "balance", "subtotal","grana", "amount", "balance", "subtotal", "t0tal"]),
-       
-        ("paid", ["paid", "payment", "received", "settled","cash","paid", "paymeni", "receivcd", "settled","cash", "pald"]),
-        ("due", ["due", "unpaid", "outstanding", "owed", "balance due"]),        
-        ("tax", ["tax", "gst", "cgst", "sgst", "igst"])
-        ,
-         ("change", ["change", "returned", "overpayment"]),
-       
-    ]
     results: List[Dict[str, object]] = []
+    labels_by_segment: Dict[str, str] = {}
     for tok in tokens:
         # If the original token contains % then it's a discount percentage
         if '%' in tok.raw:
@@ -177,16 +407,19 @@ def classify_amounts(tokens: List[Token]) -> List[Dict[str, object]]:
             # Attempt to narrow the context to the nearest segment delimited
             # by vertical bars or newlines.
             segment = tok.context
-            for part in re.split(r"[\|\n]", tok.context):
-                if tok.raw in part:
-                    segment = part
-                    break
-            context_lower = segment.lower()
-            label = 'other'
-            for type_name, keywords in rules:
-                if any(kw in context_lower for kw in keywords):
-                    label = type_name
-                    break
+            if '|' in segment or '\n' in segment:
+                for part in _SEGMENT_RE.split(segment):
+                    if tok.raw in part:
+                        segment = part
+                        break
+            # Overlapping context windows often repeat, so remember the
+            # label for each segment already seen in this document.
+            label = labels_by_segment.get(segment)
+            if label is None:
+                # Every keyword contains a letter, so a segment without any
+                # letters cannot match a rule.
+                label = _match_rule(segment.lower()) if _LETTER_RE.search(segment) else 'other'
+                labels_by_segment[segment] = label
         results.append({
             'type': label,
             'value': tok.normalized,
@@ -207,10 +440,19 @@ def validate_amounts(amounts: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]
         A tuple containing the amounts list (potentially with added error entry)
         and a validation status string.
     """
-    # Use next() with a default value of None to safely find the values
-    total = next((a['value'] for a in amounts if a['type'] == 'total_bill'), None)
-    paid = next((a['value'] for a in amounts if a['type'] == 'paid'), None)
-    due = next((a['value'] for a in amounts if a['type'] == 'due'), None)
+    # Pick the first value of each type in a single pass, stopping early
+    # once all three have been seen.
+    total = paid = due = None
+    for a in amounts:
+        t = a['type']
+        if t == 'total_bill' and total is None:
+            total = a['value']
+        elif t == 'paid' and paid is None:
+            paid = a['value']
+        elif t == 'due' and due is None:
+            due = a['value']
+        if total is not None and paid is not None and due is not None:
+            break
 
     # Simple check for total consistency
     TOLERANCE = 0.01
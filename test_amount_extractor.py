@@ -0,0 +1,15 @@
+"""Regression tests for ``amount_extractor``."""
+
+import amount_extractor as ae
+
+
+def test_digit_run_beyond_int_conversion_limit_is_skipped():
+    # int() refuses strings longer than sys.get_int_max_str_digits().
+    tokens, corrected, total = ae.find_numeric_tokens("Total " + "1" * 5000, window=2)
+    assert (tokens, corrected, total) == ([], 0, 1)
+
+
+def test_integer_too_large_for_float_is_skipped():
+    tokens, _, total = ae.find_numeric_tokens("Total " + "1" * 400 + " Paid 5", window=2)
+    assert total == 2
+    assert [(t.raw, t.normalized) for t in tokens] == [("5", 5.0)]